@@ -12,5 +12,8 @@ setup(
         'pooch',
         'rasterio'
     ],
+    extras_require={
+        'cache': ['diskcache'],
+    },
 )
 
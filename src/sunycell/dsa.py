@@ -5,16 +5,26 @@ Archive.
 Most of these functions are wrappers or helpers for the histomicstk library.
 """
 
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
 import girder_client
 from histomicstk.annotations_and_masks.annotation_and_mask_utils import (
     get_scale_factor_and_appendStr,
-    get_image_from_htk_response,
-    get_bboxes_from_slide_annotations,
+    get_rotated_rectangular_coords,
 )
 from histomicstk.saliency.tissue_detection import get_slide_thumbnail
+from io import BytesIO
+import json
+import logging
 import numpy as np
+import os
+import pandas as pd
+from PIL import Image
 import rasterio
 import rasterio.features
+import requests
+from requests.adapters import HTTPAdapter
 from scipy import ndimage as ndi
 import shapely
 from shapely.affinity import affine_transform
@@ -24,10 +34,41 @@ from skimage.color import rgb2hed
 from skimage.measure import label
 from skimage.morphology import disk, opening, remove_small_objects, binary_erosion, binary_dilation
 from sunycell import dsa
-from typing import Tuple, Union
+import threading
+from typing import Dict, List, Sequence, Tuple, Union
+from urllib3.util.retry import Retry
+import warnings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Optional on-disk cache of decoded ROIs, enabled by pointing SUNYCELL_ROI_CACHE
+# at a cache directory (requires the `diskcache` package)
+if diskcache is not None and os.environ.get('SUNYCELL_ROI_CACHE'):
+    _ROI_CACHE = diskcache.Cache(os.environ['SUNYCELL_ROI_CACHE'],
+                                 size_limit=20 * 2**30,
+                                 eviction_policy='least-recently-used')
+else:
+    _ROI_CACHE = None
+
+# Last ETag and raw JSON body seen per (server, annotation id), for conditional GETs.
+# Bounded so that cohort-scale loops don't keep every annotation in memory.
+_ANNOTATION_CACHE_SIZE = 128
+_ANNOTATION_ETAGS = OrderedDict()
+_ANNOTATION_ETAGS_LOCK = threading.Lock()
+
+
+class DSAImage:
+    __slots__ = (
+        'conn', 'collection_name', 'folder_name', 'image_name', 'folder_path',
+        '_collection_id', '_folder_id', '_sample_id',
+        '_metadata', '_levels', '_resolution', '_height', '_width', '_scales',
+    )
 
-
-class DSAImage(dict):
     def __init__(
             self,
             conn: girder_client.GirderClient,
@@ -41,25 +82,26 @@ class DSAImage(dict):
         self.image_name = image_name
         self.folder_path = f'{collection_name}/{folder_name}'
 
-        # Initialize all properties with a single connection
-        with self.conn.session() as session:
-            self._collection_id = dsa.get_collection_id(
-                conn=self.conn,
-                collection_name=self.collection_name)
-            
-            self._folder_id = dsa.get_folder_id(
-                conn=self.conn,
-                folder_path=self.folder_path)
-            
-            self._sample_id = dsa.get_sample_id(
-                conn=self.conn,
-                sample_name=self.image_name,
-                folder_path=self.folder_path)
-
-            self._metadata = dsa.image_metadata(
-                self.conn,
-                self._sample_id)
-            
+        # Connections from dsa_connection() already share a pooled session,
+        # so these lookups reuse its keep-alive connections
+        self._collection_id = dsa.get_collection_id(
+            conn=self.conn,
+            collection_name=self.collection_name)
+
+        self._folder_id = dsa.get_folder_id(
+            conn=self.conn,
+            folder_path=self.folder_path)
+
+        self._sample_id = dsa.get_sample_id(
+            conn=self.conn,
+            sample_name=self.image_name,
+            folder_path=self.folder_path,
+            folder_id=self._folder_id)
+
+        # Metadata is fetched lazily on first access and then reused
+        self._metadata = None
+        self._scales = {}
+
     def __repr__(self):
         properties = []
         properties.extend([
@@ -93,13 +135,40 @@ class DSAImage(dict):
 
     @property
     def metadata(self) -> dict:
-        """Metadata dictionary returned from DSA."""
+        """Metadata dictionary returned from DSA.
+
+        Fetched once and cached; use `invalidate_metadata()` to force a refresh.
+        """
+        if self._metadata is None:
+            self._load_metadata()
         return self._metadata
-       
+
+    def invalidate_metadata(self):
+        """Drop the cached metadata so the next access refetches it from the DSA."""
+        self._metadata = None
+        self._scales.clear()
+
+    def _load_metadata(self):
+        """Fetch the metadata and unpack the fields used by the properties below."""
+        metadata = dsa.image_metadata(self.conn, self.sample_id)
+
+        self._levels = metadata['levels']
+        self._height = metadata['sizeY']
+        self._width = metadata['sizeX']
+        # Images without a calibrated pixel size report mm_x / mm_y as None
+        if metadata.get('mm_x') is not None and metadata.get('mm_y') is not None:
+            self._resolution = 1000 * (metadata['mm_x'] + metadata['mm_y']) / 2.0
+        else:
+            self._resolution = None
+
+        self._metadata = metadata
+
     @property
     def levels(self) -> int:
         """Number of levels in this image."""
-        return self.metadata['levels']
+        if self._metadata is None:
+            self._load_metadata()
+        return self._levels
         
     @property
     def resolution(self) -> float:
@@ -107,17 +176,23 @@ class DSAImage(dict):
         
         Calculated as the average of the mm_x and mm_y properties.
         """
-        return 1000 * (self.metadata['mm_x'] + self.metadata['mm_y']) / 2.0
+        if self._metadata is None:
+            self._load_metadata()
+        return self._resolution
     
     @property
     def height(self) -> int:
         """Image height, if 2D."""
-        return self.metadata['sizeY']
+        if self._metadata is None:
+            self._load_metadata()
+        return self._height
     
     @property
     def width(self) -> int:
         """Image width, if 2D."""
-        return self.metadata['sizeX']
+        if self._metadata is None:
+            self._load_metadata()
+        return self._width
 
     @property
     def shape(self) -> Tuple[int, int]:
@@ -134,34 +209,41 @@ class DSAImage(dict):
         if mpp is None:
             return dsa.image_data(self.conn, self.sample_id, bounds_dict=bounds)
         else:
-            scale_factor, appendStr = get_scale_factor_and_appendStr(self.conn,
-                                                             self.sample_id,
-                                                             MPP=float(mpp),
-                                                             MAG=None)
+            scale_factor, appendStr = self._scale_for(mpp)
             return dsa.image_data(self.conn, self.sample_id, bounds_dict=bounds, appendStr=appendStr)
-    
+
+    def rois(self, bounds_list: Sequence[dict], mpp: float = None, max_workers: int = 8) -> List[np.array]:
+        """Pull several ROIs from this image concurrently, in the order given.
+
+        The scale string for `mpp` is computed once for the whole batch, and at
+        most `max_workers` requests are in flight at a time.
+        """
+        appendStr = None
+        if mpp is not None:
+            _, appendStr = self._scale_for(mpp)
+
+        # Normalize the bounds keys once here so image_data can skip it
+        bounds_list = [{k.lower(): v for k, v in bounds.items()} for bounds in bounds_list]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda bounds: dsa.image_data(self.conn, self.sample_id, bounds_dict=bounds,
+                                              appendStr=appendStr, lowercase_keys=False),
+                bounds_list))
+
+    def _scale_for(self, mpp: float) -> Tuple[float, str]:
+        """Scale factor and region query string for `mpp`, memoized per image.
+
+        Computed from the cached metadata, so no request is made to the server.
+        """
+        mpp = float(mpp)
+        if mpp not in self._scales:
+            self._scales[mpp] = dsa._scale_factor_and_appendStr(self.metadata, mpp)
+        return self._scales[mpp]
+
     def annotations(self) -> dict:
-        """Obtain the annotations for the image, filtered by target_groups."""
-        
-        annotation_response = self.conn.get(f'annotation/item/{self.sample_id}')
-        
-        annotation_elements = dict()
-        
-        for annotation_object in annotation_response:
-            annotation = annotation_object['annotation']
-            elements_list = annotation['elements']
-            
-            for e in elements_list:
-                # Ensure that the object has a class assigned to it; if not, assign "default"
-                if 'group' not in e.keys():
-                    e['group'] = 'default'
-
-                if e['group'] in annotation_elements.keys():
-                    annotation_elements[e['group']].append(e)
-                else:
-                    annotation_elements[e['group']] = [e]
-        
-        return annotation_elements
+        """Obtain the annotations for the image, grouped by element group."""
+        return dsa.annotations(self.conn, self.sample_id)
 
 
     def tile_wsi(self, tile_size: int = 1024, target_mpp: Union[float, None] = None) -> list:
@@ -357,6 +439,11 @@ class DSAImage(dict):
 def dsa_connection(api_url: str, api_key: str) -> girder_client.GirderClient:
     """Connect to a DSA server.
 
+    The returned client sends every request through a single pooled
+    `requests.Session`, so repeated calls reuse keep-alive connections instead
+    of opening a new TCP/TLS connection each time. Transient server errors are
+    retried with backoff.
+
     Parameters
     ----------
     api_url : string
@@ -372,27 +459,57 @@ def dsa_connection(api_url: str, api_key: str) -> girder_client.GirderClient:
     """
     gc = girder_client.GirderClient(apiUrl=api_url)
     gc.authenticate(apiKey=api_key)
+
+    # girder_client routes all requests through `_session` when it is set
+    retry = Retry(total=5,
+                  backoff_factor=0.3,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    gc._session = session
+
     return gc
 
 
 def get_collection_id(conn: girder_client.GirderClient,
                       collection_name: str) -> str:
-    """Given a connection, grab the id of the target collection."""
-    collection_id = None
+    """Given a connection, grab the id of the target collection.
+
+    The name is matched on the server, and results are cached per connection.
+    Raises LookupError if no collection has exactly this name.
+    """
+    return _collection_id(conn, collection_name, True)
+
+
+@functools.lru_cache(maxsize=256)
+def _collection_id(conn: girder_client.GirderClient, collection_name: str, full_scan: bool) -> str:
+    """Cached body of `get_collection_id`, always called positionally.
+
+    lru_cache keys on how the arguments were passed, so keyword and positional
+    calls to the public function would otherwise be cached separately.
+    With `full_scan` False, only the server-side text search is tried.
+    """
+    # Let the server narrow the collections down to those matching the name
+    collection_list = conn.get('collection', parameters={'text': collection_name, 'limit': 5})
 
-    # List all collections and find the target one
-    collection_list = list(conn.listCollection())
+    collection_id = next(
+        (c['_id'] for c in collection_list if c['name'] == collection_name), None)
 
-    assert len(collection_list) > 0, \
-        f"Cannot find collection named {collection_name} on Histomics. " \
-        + "Please check that the server connection is working, that you have " \
-        + "access to the collection, and that you are spelling everything " \
-        + "correctly."
+    if collection_id is None and full_scan:
+        # The text search can miss exact names (stop words, or more matches than
+        # the limit), so page through the collections until the first match
+        collection_id = next(
+            (c['_id'] for c in conn.listCollection() if c['name'] == collection_name), None)
 
-    for collection in collection_list:
-        if collection['name'] == collection_name:
-            collection_id = collection['_id']
-    assert collection_id, f"Connected, but could not find {collection_name}."
+    if collection_id is None:
+        raise LookupError(
+            f"Cannot find collection named {collection_name} on Histomics. "
+            "Please check that the server connection is working, that you have "
+            "access to the collection, and that you are spelling everything "
+            "correctly.")
 
     return collection_id
 
@@ -400,55 +517,122 @@ def get_collection_id(conn: girder_client.GirderClient,
 def get_folder_id(conn: girder_client.GirderClient,
                   folder_path: str,
                   search_limit: int = 1000) -> str:
-    """Given a folder name and connection, return the folder ID number."""
-    folder_id = None
+    """Given a folder name and connection, return the folder ID number.
+
+    Results are cached per connection and folder path.
+    """
+    try:
+        return _folder_id_from_path(conn, folder_path, search_limit)
+    except LookupError as exc:
+        logger.warning('%s', exc)
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _folder_id_from_path(conn: girder_client.GirderClient,
+                         folder_path: str,
+                         search_limit: int) -> str:
+    """Walk a `collection/folder/...` path one segment at a time.
+
+    Each segment is resolved with an exact-name query under its parent, so the
+    cost is one request per path segment. Paths that do not start with a
+    collection (e.g. user folders) fall back to a text search.
+    Raises LookupError if the path does not exist.
+    """
+    collection_name, *folder_names = folder_path.split('/')
+
+    # Skip the full collection listing: a miss here usually means the path is
+    # rooted in a user, and that listing would be repeated on every lookup
+    try:
+        parent_id = _collection_id(conn, collection_name, False)
+    except LookupError:
+        return _search_folder_id(conn, folder_path, search_limit)
+
+    if len(folder_names) == 0:
+        raise LookupError(f'Did not find folder path {folder_path} on the server.')
+
+    parent_type = 'collection'
+    for folder_name in folder_names:
+        folder_results = conn.get('folder', parameters={
+            'parentType': parent_type,
+            'parentId': parent_id,
+            'name': folder_name})
+        if len(folder_results) == 0:
+            raise LookupError(f'Did not find folder path {folder_path} on the server.')
 
+        parent_id = folder_results[0]['_id']
+        parent_type = 'folder'
+
+    return parent_id
+
+
+def _search_folder_id(conn: girder_client.GirderClient,
+                      folder_path: str,
+                      search_limit: int) -> str:
+    """Find a folder by text search on its name, then validate its full path.
+
+    The candidates' root paths are fetched concurrently, and the remaining
+    lookups are cancelled once one of them matches.
+    Raises LookupError if none of the candidates match `folder_path`.
+    """
     folder_name = folder_path.split('/')[-1]
 
     # Get a list of all folders that match the target (terminal) folder name
     folder_results = conn.get(f'/folder?parentType=folder&text={folder_name}&limit={search_limit}&sort=lowerName&sortdir=1')
 
-    # Cycle through the results and validate that the paths match with our list of folder parts
-    for folder_result in folder_results:
-        folder_result_id = folder_result['_id']
+    if len(folder_results) == 0:
+        raise LookupError(f'Did not find folder path {folder_path} on the server.')
 
-        # Get the folder path for this folder
-        folder_root_objects = conn.get(f'/folder/{folder_result_id}/rootpath')
+    # Validate that the candidates' paths match with our folder path
+    with ThreadPoolExecutor(max_workers=min(8, len(folder_results))) as executor:
+        futures = {
+            executor.submit(_folder_root_path, conn, folder_result): folder_result['_id']
+            for folder_result in folder_results}
 
-        folder_root_path_parts = []
+        for future in as_completed(futures):
+            if future.result() == folder_path:
+                for pending in futures:
+                    pending.cancel()
+                return futures[future]
 
-        for folder_root_object in folder_root_objects:
-            if 'login' in folder_root_object['object'].keys():
-                folder_root_path_parts.append(folder_root_object['object']['login'])
-            elif 'name' in folder_root_object['object'].keys():
-                folder_root_path_parts.append(folder_root_object['object']['name'])
-            else:
-                print(f'WARNING: Cannot identify the type of {folder_root_object}')
-                return None
-            
-        # Append the folder name as well
-        folder_root_path_parts.append(folder_result['name'])
+    raise LookupError(f'Did not find folder path {folder_path} on the server.')
 
-        if '/'.join(folder_root_path_parts) == folder_path:
-            return folder_result_id
-    
-    print(f'WARNING: Did not find folder path {folder_path} on the server.')
-    return None
 
+def _folder_root_path(conn: girder_client.GirderClient, folder_result: dict) -> str:
+    """Rebuild the full `root/.../folder` path of a folder from the server."""
+    folder_root_objects = conn.get(f'/folder/{folder_result["_id"]}/rootpath')
+
+    folder_root_path_parts = []
+
+    for folder_root_object in folder_root_objects:
+        if 'login' in folder_root_object['object'].keys():
+            folder_root_path_parts.append(folder_root_object['object']['login'])
+        elif 'name' in folder_root_object['object'].keys():
+            folder_root_path_parts.append(folder_root_object['object']['name'])
+        else:
+            raise LookupError(f'Cannot identify the type of {folder_root_object}')
+
+    # Append the folder name as well
+    folder_root_path_parts.append(folder_result['name'])
+
+    return '/'.join(folder_root_path_parts)
 
-def get_sample_id(conn, sample_name, folder_path):
+
+def get_sample_id(conn, sample_name, folder_path, folder_id=None):
     """Given a connection, collection & folder combo, and sample name, return the sample ID number.
 
     We assume that there are no nested folders -- it goes collection /
     folder_list / item_list
+
+    If the folder ID is already known, pass it as `folder_id` to skip resolving
+    `folder_path` on the server.
     """
-    id_list, item_list = ids_names_from_htk(conn, folder_path)
+    sample_id = item_id_from_htk(conn, sample_name, folder_path, folder_id=folder_id)
 
-    for (id, item) in zip(id_list, item_list):
-        if item == sample_name:
-            return id
-    print(f'Did not find sample {sample_name} in {folder_path}. Please recheck your access and spelling of the path.')
-    return None
+    if sample_id is None:
+        logger.warning('Did not find sample %s in %s. Please recheck your access and spelling of the path.',
+                       sample_name, folder_path)
+    return sample_id
 
 
 def image_metadata(conn, sample_id):
@@ -457,10 +641,11 @@ def image_metadata(conn, sample_id):
     return resp
 
 
-def ids_names_from_htk(conn, folder_path):
+def ids_names_from_htk(conn, folder_path, folder_id=None):
     """Get all item IDs and names in a folder."""
     
-    folder_id = get_folder_id(conn, folder_path)
+    if folder_id is None:
+        folder_id = get_folder_id(conn, folder_path)
     
     item_list_htk = conn.listItem(folder_id)
 
@@ -474,55 +659,246 @@ def ids_names_from_htk(conn, folder_path):
     return item_ids, item_names
 
 
+def item_id_from_htk(conn, item_name, folder_path, folder_id=None):
+    """Get the ID of the item with the given name in a folder.
+
+    The name is matched on the server and the first exact match is returned
+    without listing the rest of the folder. Returns None if there is no match.
+    """
+    if folder_id is None:
+        folder_id = get_folder_id(conn, folder_path)
+
+    for item in conn.listItem(folder_id, name=item_name):
+        if item['name'] == item_name:
+            return item['_id']
+    return None
+
+
+def list_items_bulk(conn: girder_client.GirderClient,
+                    folder_ids: Sequence[str],
+                    max_workers: int = 16) -> Dict[str, List[dict]]:
+    """List the items of several folders concurrently, keyed by folder ID."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        item_lists = executor.map(lambda folder_id: list(conn.listItem(folder_id)), folder_ids)
+        return dict(zip(folder_ids, item_lists))
+
+
+def slide_bundle(conn: girder_client.GirderClient,
+                 slide_id: str,
+                 target_mpp: Union[float, None] = None,
+                 group_list=None,
+                 with_element_infos: bool = True,
+                 with_bboxes: bool = False,
+                 with_target_elements: bool = True) -> dict:
+    """Fetch a slide's annotations and tile metadata together.
+
+    The annotation and metadata requests are sent concurrently, and the scale
+    factor for `target_mpp` is computed from the fetched metadata instead of
+    requesting it again.
+
+    Returns a dict with keys:
+        annotations_resp: raw annotation response from the server
+        metadata: tile metadata of the slide
+        element_infos: element bounding boxes, filtered by group_list
+            (None if `with_element_infos` is False)
+        bboxes: float32 array of the element_infos (xmin, xmax, ymin, ymax) columns
+            (None unless both `with_element_infos` and `with_bboxes` are True)
+        scale_factor, appendStr: scaling for target_mpp (1.0 and None if not given)
+        target_elements: elements with a group, filtered by group_list
+            (None if `with_target_elements` is False)
+
+    Group names in `group_list` are matched case-insensitively.
+    """
+    annotations_resp, metadata = _fetch_slide(conn, slide_id)
+    return _slide_bundle_from(annotations_resp, metadata, target_mpp, group_list,
+                              with_element_infos, with_bboxes, with_target_elements)
+
+
+def _fetch_slide(conn: girder_client.GirderClient, slide_id: str) -> Tuple[list, dict]:
+    """Fetch a slide's annotations and tile metadata concurrently."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        annotations_future = executor.submit(conn.get, f'annotation/item/{slide_id}')
+        metadata_future = executor.submit(image_metadata, conn, slide_id)
+        return annotations_future.result(), metadata_future.result()
+
+
+def _slide_bundle_from(annotations_resp: list,
+                       metadata: dict,
+                       target_mpp: Union[float, None],
+                       group_list,
+                       with_element_infos: bool,
+                       with_bboxes: bool = False,
+                       with_target_elements: bool = True) -> dict:
+    """Build the `slide_bundle` dict from already-fetched responses."""
+    # Case-insensitive group set, built once for O(1) membership tests
+    groups = None
+    if group_list is not None:
+        groups = frozenset(x.lower() for x in group_list)
+
+    # Get the scale factor and string for this slide
+    if target_mpp is None:
+        scale_factor, appendStr = 1.0, None
+    else:
+        scale_factor, appendStr = _scale_factor_and_appendStr(metadata, float(target_mpp))
+
+    # Get the info of the elements based on the now-scaled annotations
+    element_infos = None
+    bboxes = None
+    if with_element_infos:
+        element_infos = _element_bboxes(annotations_resp)
+        if groups is not None:
+            element_groups = element_infos['group'].fillna('').str.lower().to_numpy()
+            element_infos = element_infos[np.isin(element_groups, np.array(sorted(groups)))]
+        if with_bboxes:
+            bboxes = np.ascontiguousarray(
+                element_infos[['xmin', 'xmax', 'ymin', 'ymax']].to_numpy(dtype=np.float32))
+
+    # Keep the elements that have a group (i.e. a class) we're looking for
+    target_elements = None
+    if with_target_elements:
+        target_elements = [
+            element
+            for annotation in annotations_resp
+            for element in annotation['annotation']['elements']
+            if 'group' in element and (groups is None or element['group'].lower() in groups)]
+
+    return {
+        'annotations_resp': annotations_resp,
+        'metadata': metadata,
+        'element_infos': element_infos,
+        'bboxes': bboxes,
+        'scale_factor': scale_factor,
+        'appendStr': appendStr,
+        'target_elements': target_elements,
+    }
+
+
+def _element_bboxes(annotations_resp: list) -> pd.DataFrame:
+    """Bounding boxes of the annotation elements, one row per element.
+
+    Same columns as histomicstk's get_bboxes_from_slide_annotations, but the
+    columns are collected first and the DataFrame is built once instead of
+    growing it row by row. Elements that are neither polylines nor rectangles
+    have NaN bounds and no group, as in histomicstk.
+    """
+    annidx, elementidx, types, groups, bounds, areas = [], [], [], [], [], []
+
+    for ann_idx, annotation in enumerate(annotations_resp):
+        for element_idx, element in enumerate(annotation['annotation']['elements']):
+            annidx.append(ann_idx)
+            elementidx.append(element_idx)
+            types.append(element['type'])
+
+            if element['type'] == 'polyline':
+                coords = np.array(element['points'])[:, :-1]
+                xmin, ymin = (int(j) for j in np.min(coords, axis=0))
+                xmax, ymax = (int(j) for j in np.max(coords, axis=0))
+            elif element['type'] == 'rectangle':
+                roiinfo = get_rotated_rectangular_coords(
+                    roi_center=element['center'],
+                    roi_width=element['width'],
+                    roi_height=element['height'],
+                    roi_rotation=element['rotation'])
+                xmin, ymin = roiinfo['x_min'], roiinfo['y_min']
+                xmax, ymax = roiinfo['x_max'], roiinfo['y_max']
+            else:
+                groups.append(None)
+                bounds.append((np.nan, np.nan, np.nan, np.nan))
+                areas.append(np.nan)
+                continue
+
+            # Use the group, or infer it from the label
+            if 'group' in element:
+                groups.append(element['group'])
+            elif 'label' in element:
+                groups.append(element['label']['value'])
+            else:
+                groups.append(None)
+            bounds.append((xmin, xmax, ymin, ymax))
+            areas.append(int((ymax - ymin) * (xmax - xmin)))
+
+    bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+    element_infos = pd.DataFrame({
+        'annidx': annidx,
+        'elementidx': elementidx,
+        'type': types,
+        'group': pd.Series(groups, dtype=object),
+        'xmin': bounds[:, 0],
+        'xmax': bounds[:, 1],
+        'ymin': bounds[:, 2],
+        'ymax': bounds[:, 3],
+        # Integer areas (NaN for skipped elements) in an object column, as in histomicstk
+        'bbox_area': pd.Series(areas, dtype=object),
+    })
+
+    return element_infos
+
+
+def _scale_factor_and_appendStr(metadata: dict, target_mpp: float) -> Tuple[float, str]:
+    """Scale factor and region query string for a target MPP.
+
+    Same result as histomicstk's get_scale_factor_and_appendStr, computed from
+    already-fetched tile metadata.
+    """
+    if metadata.get('mm_x') is None:
+        warnings.warn('NO SLIDE MAGNIFICATION FOUND; BASE MAGNIFICATION USED!',
+                      RuntimeWarning, stacklevel=2)
+        return 1.0, ''
+
+    mm = 0.001 * target_mpp
+    return metadata['mm_x'] / mm, '&mm_x=%.8f&mm_y=%.8f' % (mm, mm)
+
+
 def slide_annotations(conn, slide_id, target_mpp, log=None, group_list=None):
     """Return a single slide's annotations.
 
     Accepts an optional annotation_list parameter indicating the groups to get.
     If not provided, grab everything.
+    Warnings go to `log` if given, otherwise to this module's logger.
     """
-    # Case-insensitive group list!
-    if group_list is not None:
-        gl = [x.lower() for x in group_list]
+    if log is None:
+        log = logger
 
     # Pull down the annotation objects
     try:
-        annotations_resp = conn.get('/annotation/item/' + slide_id)
+        annotations_resp, metadata = _fetch_slide(conn, slide_id)
     except girder_client.HttpError:
         # The server couldn't find the object
-        if log is not None:
-            log.warning(f'Could not find an item on the server with id {slide_id}.')
-        else:
-            print(f'Could not find an item on the server with id {slide_id}.')
+        log.warning('Could not find an item on the server with id %s.', slide_id)
         return None, None, None
-    except Exception:
+    except Exception as exc:
         # Unclear why this failure happened
-        if log is not None:
-            log.warning(f'Caught exception {Exception} while getting annotations for {slide_id}.')
-        else:
-            print(f'Something went wrong getting annotations for {slide_id}.')
+        log.warning('Caught exception %r while getting annotations for %s.', exc, slide_id, exc_info=True)
         return None, None, None
 
     # Do they exist? If not, return false
     if len(annotations_resp) == 0:
-        if log is not None:
-            log.warning(f'No annotations were found for {slide_id}.')
-        else:
-            print(f'No annotations were found for {slide_id}.')
+        log.warning('No annotations were found for %s.', slide_id)
 
-    #    return None, None, None
+    # Errors while scaling or parsing the annotations are not caught here
+    bundle = _slide_bundle_from(annotations_resp, metadata, target_mpp, group_list,
+                                with_element_infos=True, with_target_elements=False)
 
-    # Get the scale factor and string for this slide
-    scale_factor, appendStr = get_scale_factor_and_appendStr(conn,
-                                                             slide_id,
-                                                             MPP=float(target_mpp),
-                                                             MAG=None)
+    return bundle['element_infos'], bundle['scale_factor'], bundle['appendStr']
 
-    # Get the info of the elements based on the now-scaled annotations
-    element_infos = get_bboxes_from_slide_annotations(annotations_resp)
-    if group_list is not None:
-        element_infos = element_infos[element_infos['group'].isin(gl)]
 
-    return element_infos, scale_factor, appendStr
+def slide_annotations_bulk(conn: girder_client.GirderClient,
+                           slide_ids: Sequence[str],
+                           target_mpp: float,
+                           group_list=None,
+                           max_workers: int = 16) -> Dict[str, Tuple]:
+    """Return the annotations of several slides, keyed by slide ID.
+
+    Each value is the `(element_infos, scale_factor, appendStr)` tuple returned
+    by `slide_annotations`. The per-slide requests are issued concurrently over
+    the connection's session, so the total time is bounded by the slowest
+    slide rather than the sum of all of them.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda slide_id: slide_annotations(conn, slide_id, target_mpp, group_list=group_list),
+            slide_ids)
+        return dict(zip(slide_ids, results))
 
 
 def slide_elements(conn, item_id, target_mpp=None, group_list=None):
@@ -531,38 +907,39 @@ def slide_elements(conn, item_id, target_mpp=None, group_list=None):
     Each element in this list corresponds to a polygon.
     Optionally, ask for elements that belong to a specific group or list of groups.
     """
-    # Pull down the annotation objects
-    annotations_resp = conn.get('annotation/item/' + item_id)
-    img_metadata = conn.get('item/' + item_id + '/tiles')
-    # img_name = conn.get('item/' + item_id)['name']
+    # Only the raw elements are needed, so skip scaling and bounding boxes
+    bundle = slide_bundle(conn, item_id, group_list=group_list, with_element_infos=False)
 
-    if len(annotations_resp) == 0:
-        print('The annotation response had a length of Zero')
+    if len(bundle['annotations_resp']) == 0:
+        logger.warning('The annotation response for %s had a length of zero.', item_id)
         return [], []
 
-    # Initialize the gt annotation holder
-    target_elements = []
+    return bundle['target_elements'], bundle['metadata']
 
-    # Cycle through each annotation on this item
-    for annotation in annotations_resp:
-        elements = annotation['annotation']['elements']
-        # Cycle through each of the annotation elements
-        for element in elements:
-            # Check that this item has a group (i.e. a class)
-            if 'group' in element.keys():
-                # If this group is what we're looking for, then pull it
-                if group_list is not None and element['group'] in group_list:
-                    target_elements.append(element)
-                elif group_list is None:
-                    target_elements.append(element)
 
-    return target_elements, img_metadata
+def image_data(conn, sample_id, bounds_dict, appendStr=None, out=None, cache=True, lowercase_keys=True):
+    """Return a numpy image defined by the connection, sample_id, and ROI.
 
+    Pass an (H, W, 3) uint8 array as `out` to have the pixels copied into it,
+    e.g. to fill one reusable batch buffer; it is returned in place of a new
+    array. The decoder still allocates its own image, so this does not save
+    memory per ROI. Raises ValueError if `out` does not match the ROI.
+
+    If the on-disk ROI cache is enabled (see `SUNYCELL_ROI_CACHE`), decoded
+    ROIs are stored there and reused until the item changes on the server.
+    The item's update time is looked up once per process, so a change made
+    while a process is running is only picked up by later processes.
+    Pass `cache=False` to always fetch from the server.
+
+    Callers whose bounds keys are already lowercase can pass
+    `lowercase_keys=False` to skip normalizing them.
+    """
+    if out is not None and (out.dtype != np.uint8 or out.ndim != 3 or out.shape[2] != 3):
+        raise ValueError(f'out must be an (H, W, 3) uint8 array, got {out.dtype} with shape {out.shape}.')
 
-def image_data(conn, sample_id, bounds_dict, appendStr=None):
-    """Return a numpy image defined by the connection, sample_id, and ROI."""
     # Convert the keys of the bounds_dict to lowercase
-    bounds_dict = {k.lower(): v for k, v in bounds_dict.items()}
+    if lowercase_keys:
+        bounds_dict = {k.lower(): v for k, v in bounds_dict.items()}
 
     # Ensure the keys are present for the bounding box
     assert 'xmin' in bounds_dict and \
@@ -572,32 +949,68 @@ def image_data(conn, sample_id, bounds_dict, appendStr=None):
         'bounds_dict is not formatted properly. ' \
         'Please make sure xmin, xmax, ymin, ymax is included in the keys.'
 
-    getStr = f"item/{sample_id}/tiles/region?" + \
-        f"left={bounds_dict['xmin']}&" + \
-        f"right={bounds_dict['xmax']}&" + \
-        f"top={bounds_dict['ymin']}&" + \
-        f"bottom={bounds_dict['ymax']}"
-
-    if appendStr is not None:
-        getStr += appendStr
+    getStr = (f"item/{sample_id}/tiles/region?"
+              f"left={bounds_dict['xmin']}&right={bounds_dict['xmax']}&"
+              f"top={bounds_dict['ymin']}&bottom={bounds_dict['ymax']}"
+              f"{appendStr or ''}")
+
+    # The item's last update time invalidates cached ROIs when the slide changes
+    cache_key = None
+    if cache and _ROI_CACHE is not None:
+        try:
+            updated = _item_updated(conn, sample_id)
+        except Exception as exc:
+            logger.warning('%r: Could not retrieve item %s.', exc, sample_id, exc_info=True)
+            return None
+        cache_key = (conn.urlBase, getStr, updated)
+        cached = _ROI_CACHE.get(cache_key)
+        if cached is not None:
+            img_roi = np.load(BytesIO(cached))
+            if out is not None:
+                return _copy_roi(img_roi, out)
+            return img_roi
 
     # Get the image raw response
     try:
         resp = conn.get(getStr, jsonResp=False)
-    except Exception:
-        print(f'{Exception}: Could not retrieve image response with {getStr}.')
+    except Exception as exc:
+        logger.warning('%r: Could not retrieve image response with %s.', exc, getStr, exc_info=True)
         return None
 
     # Sometimes this fails, and I'm not sure why
     try:
-        img_roi = get_image_from_htk_response(resp)
-    except Exception:
-        print(f'{Exception}: Could not convert image response {resp} to image')
+        with Image.open(BytesIO(resp.content)) as image:
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            img_roi = np.array(image, dtype=np.uint8)
+    except Exception as exc:
+        logger.warning('%r: Could not convert image response %s to image.', exc, resp, exc_info=True)
         return None
 
+    if cache_key is not None:
+        buffer = BytesIO()
+        np.save(buffer, img_roi)
+        _ROI_CACHE.set(cache_key, buffer.getvalue())
+
+    if out is not None:
+        return _copy_roi(img_roi, out)
     return img_roi
 
 
+def _copy_roi(img_roi: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Copy a decoded ROI into the caller's `out` array."""
+    if out.shape != img_roi.shape:
+        raise ValueError(f'out has shape {out.shape}, but the ROI has shape {img_roi.shape}.')
+    np.copyto(out, img_roi)
+    return out
+
+
+@functools.lru_cache(maxsize=1024)
+def _item_updated(conn: girder_client.GirderClient, sample_id: str) -> str:
+    """Return the last update time of an item, fetched once per connection and process."""
+    return conn.get(f'item/{sample_id}')['updated']
+
+
 def slide_roi(conn: girder_client.GirderClient,
               sample_id: str,
               bounds: dict,
@@ -674,26 +1087,64 @@ def tile_polygon(slide_resolution: float,
     return tile_polygons
 
 
-def annotations(conn: girder_client.GirderClient, sample_id: str) -> dict:
-    """Obtain the annotations for the image, filtered by target_groups."""
-    
-    annotation_response = conn.get(f'annotation/item/{sample_id}')
-    
-    annotation_elements = dict()
-    
+def annotations(conn: girder_client.GirderClient, sample_id: str, max_workers: int = 8) -> dict:
+    """Obtain the annotations for the image, grouped by element group.
+
+    The item's annotation ids are listed first, then each annotation is
+    fetched with a conditional GET, so a call costs 1 + N requests for N
+    annotations (sent concurrently). If the server's ETag matches the one seen
+    last time (a 304 response), the previously downloaded body is reused
+    instead of being downloaded again. Only the most recently used
+    annotations are kept, and every call returns freshly parsed elements.
+    """
+    annotation_list = conn.get('annotation', parameters={'itemId': sample_id, 'limit': 0})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        annotation_response = list(executor.map(
+            lambda annotation: _annotation_document(conn, annotation['_id']),
+            annotation_list))
+
+    annotation_elements = defaultdict(list)
+
     for annotation_object in annotation_response:
-        annotation = annotation_object['annotation']
-        elements_list = annotation['elements']
-        
-        for e in elements_list:
+        for e in annotation_object['annotation']['elements']:
             # Ensure that the object has a class assigned to it; if not, assign "default"
-            if 'group' not in e.keys():
-                e['group'] = 'default'
+            annotation_elements[e.setdefault('group', 'default')].append(e)
+
+    return dict(annotation_elements)
+
+
+def _annotation_document(conn: girder_client.GirderClient, annotation_id: str) -> dict:
+    """Fetch one annotation document, reusing the cached body on a 304.
+
+    The cache holds the raw response bytes, so each caller gets its own
+    parsed copy and changes to it never reach the cache.
+    """
+    cache_key = (conn.urlBase, annotation_id)
+    with _ANNOTATION_ETAGS_LOCK:
+        cached = _ANNOTATION_ETAGS.get(cache_key)
+    headers = {'If-None-Match': cached[0]} if cached is not None else None
+
+    resp = conn.sendRestRequest('GET', f'annotation/{annotation_id}', headers=headers, jsonResp=False)
+
+    if resp.status_code == 304:
+        _remember_annotation(cache_key, cached)
+        return json.loads(cached[1])
+
+    etag = resp.headers.get('ETag')
+    if etag is not None:
+        _remember_annotation(cache_key, (etag, resp.content))
+    else:
+        with _ANNOTATION_ETAGS_LOCK:
+            _ANNOTATION_ETAGS.pop(cache_key, None)
+
+    return resp.json()
 
-            if e['group'] in annotation_elements.keys():
-                annotation_elements[e['group']].append(e)
-            else:
-                annotation_elements[e['group']] = [e]
-    
-    return annotation_elements
 
+def _remember_annotation(cache_key: tuple, entry: tuple):
+    """Store an (etag, body) entry as most recently used, evicting the oldest."""
+    with _ANNOTATION_ETAGS_LOCK:
+        _ANNOTATION_ETAGS[cache_key] = entry
+        _ANNOTATION_ETAGS.move_to_end(cache_key)
+        while len(_ANNOTATION_ETAGS) > _ANNOTATION_CACHE_SIZE:
+            _ANNOTATION_ETAGS.popitem(last=False)